@@ -1,69 +1,77 @@
+import asyncio
 from fastapi import APIRouter, HTTPException    
 from app.models.schemas import (
-    TrainResponse, RecommendResponse, DatasetInfoResponse,
+    TrainResponse, Recommendation, RecommendResponse, DatasetInfoResponse,
     UserDetailsResponse, MovieDetailsResponse, TopRatedMoviesResponse,
     MovieSearchResponse, PopularMoviesResponse
 )
-from app.services.recommendation_service import train_model, get_recommendations, load_data
-from app.utils.data_loader import load_movie_metadata
-import pandas as pd
+from app.services.recommendation_service import (
+    train_model, get_recommendations, get_movie_stats, get_user_index, get_movie_index,
+    top_k_indices, _load_raw_df
+)
+from app.utils.data_loader import load_movie_metadata, search_movie_titles
 
 router = APIRouter()
 
+# Les données sont chargées et indexées au démarrage : les routes ne font que des lectures en mémoire et
+# s'exécutent directement dans la boucle asyncio. Seul l'entraînement, coûteux, part dans un thread.
+
+# Les réponses sont construites avec model_construct : les données viennent du serveur et sont déjà
+# typées, pydantic n'a donc pas à les revalider
+
 @router.post("/train", response_model=TrainResponse)
-def train():
+async def train():
     """
     Entraîner le modèle de recommandation
     """
-    return train_model()
+    return await asyncio.to_thread(train_model)
 
 @router.get("/recommend/{user_id}", response_model=RecommendResponse)
-def recommend(user_id: int, num_recommendations: int = 5):
+async def recommend(user_id: int, num_recommendations: int = 5):
     recommendations = get_recommendations(user_id, num_recommendations)
-    return {"user_id": user_id, "recommendations": recommendations}
+    return RecommendResponse.model_construct(
+        user_id=user_id,
+        recommendations=[Recommendation.model_construct(**r) for r in recommendations],
+    )
 
 @router.get("/dataset/info", response_model=DatasetInfoResponse)
-def dataset_info():
-    dataset = load_data()
-    df = pd.DataFrame(dataset.raw_ratings, columns=['user_id', 'item_id', 'rating', 'timestamp'])
-    num_users = df['user_id'].nunique()
-    num_items = df['item_id'].nunique()
-    num_ratings = len(df)
-    return {"num_users": num_users, "num_movies": num_items, "num_ratings": num_ratings}
+async def dataset_info():
+    num_users = len(get_user_index())
+    num_items = len(get_movie_index())
+    num_ratings = len(_load_raw_df())
+    return DatasetInfoResponse.model_construct(num_users=num_users, num_movies=num_items, num_ratings=num_ratings)
 
 @router.get("/user/{user_id}/details", response_model=UserDetailsResponse)
-def user_details(user_id: int):
-    dataset = load_data()
-    df = pd.DataFrame(dataset.raw_ratings, columns=['user_id', 'item_id', 'rating', 'timestamp'])
-    user_data = df[df['user_id'] == user_id]
-    return {"user_id": user_id, "rated_movies": user_data[['item_id', 'rating']].to_dict(orient='records')}
+async def user_details(user_id: int):
+    df = _load_raw_df()
+    user_data = df.iloc[get_user_index().get(user_id, [])]
+    return UserDetailsResponse.model_construct(
+        user_id=user_id, rated_movies=user_data[['item_id', 'rating']].to_dict(orient='records')
+    )
 
 @router.get("/movie/{movie_id}/details", response_model=MovieDetailsResponse)
-def movie_details(movie_id: int):
-    dataset = load_data()
-    df = pd.DataFrame(dataset.raw_ratings, columns=['user_id', 'item_id', 'rating', 'timestamp'])
-    movie_data = df[df['item_id'] == movie_id]
+async def movie_details(movie_id: int):
+    df = _load_raw_df()
+    movie_data = df.iloc[get_movie_index().get(movie_id, [])]
     avg_rating = movie_data['rating'].mean()
-    return {"movie_id": movie_id, "avg_rating": avg_rating, "num_ratings": len(movie_data)}
+    return MovieDetailsResponse.model_construct(movie_id=movie_id, avg_rating=avg_rating, num_ratings=len(movie_data))
 
 @router.get("/movies/top_rated", response_model=TopRatedMoviesResponse)
-def top_rated_movies(num_movies: int = 10):
-    dataset = load_data()
-    df = pd.DataFrame(dataset.raw_ratings, columns=['user_id', 'item_id', 'rating', 'timestamp'])
-    avg_ratings = df.groupby('item_id')['rating'].mean().reset_index()
-    top_movies = avg_ratings.sort_values(by='rating', ascending=False).head(num_movies)
-    return {"top_movies": top_movies.to_dict(orient='records')}
+async def top_rated_movies(num_movies: int = 10):
+    avg_ratings = get_movie_stats()['mean']
+    top = top_k_indices(avg_ratings.to_numpy(), num_movies)
+    top_movies = avg_ratings.iloc[top].rename('rating').reset_index()
+    return TopRatedMoviesResponse.model_construct(top_movies=top_movies.to_dict(orient='records'))
 
 @router.get("/movies/search", response_model=MovieSearchResponse)
-def search_movies(query: str):
+async def search_movies(query: str):
     movies_df = load_movie_metadata()
-    results = movies_df[movies_df['title'].str.contains(query, case=False)]
-    return {"results": results.to_dict(orient='records')}
+    results = movies_df[search_movie_titles(query)]
+    return MovieSearchResponse.model_construct(results=results.to_dict(orient='records'))
 
 @router.get("/movies/popular", response_model=PopularMoviesResponse)
-def popular_movies(num_movies: int = 10):
-    dataset = load_data()
-    df = pd.DataFrame(dataset.raw_ratings, columns=['user_id', 'item_id', 'rating', 'timestamp'])
-    popularity = df.groupby('item_id')['rating'].count().reset_index()
-    popular_movies = popularity.sort_values(by='rating', ascending=False).head(num_movies)
-    return {"popular_movies": popular_movies.to_dict(orient='records')}
+async def popular_movies(num_movies: int = 10):
+    popularity = get_movie_stats()['count']
+    top = top_k_indices(popularity.to_numpy(), num_movies)
+    popular_movies = popularity.iloc[top].rename('rating').reset_index()
+    return PopularMoviesResponse.model_construct(popular_movies=popular_movies.to_dict(orient='records'))
@@ -1,31 +1,129 @@
+from functools import lru_cache
+import logging
+import os
+import joblib
 from surprise import Dataset, Reader, SVD
+import numpy as np
 import pandas as pd
+from app.utils.data_loader import movielens_path
 
-# Charger les données MovieLens 100k
-def load_data():
-    url = "http://files.grouplens.org/datasets/movielens/ml-100k/u.data"
+# Notes déjà parsées, pour éviter de relire u.data à chaque redémarrage
+RATINGS_CACHE_PATH = "/tmp/ml100k.pkl"
+# Modèle entraîné sauvegardé pour ne pas ré-entraîner à chaque redémarrage
+MODEL_CACHE_PATH = "/tmp/svd.joblib"
+
+logger = logging.getLogger(__name__)
+
+# Date de modification de u.data, ou None s'il est téléchargé (pas de date locale à comparer)
+def _ratings_source_mtime():
+    path = movielens_path("u.data")
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+# Un cache est à jour s'il existe et n'est pas plus ancien que u.data
+def _is_fresh(cache_path, source_mtime):
+    return os.path.exists(cache_path) and (source_mtime is None or os.path.getmtime(cache_path) >= source_mtime)
+
+# Charger les notes MovieLens 100k (une seule fois par processus)
+@lru_cache(maxsize=1)
+def _load_raw_df():
+    if _is_fresh(RATINGS_CACHE_PATH, _ratings_source_mtime()):
+        try:
+            return pd.read_pickle(RATINGS_CACHE_PATH)
+        except Exception:
+            logger.warning("Cache des notes illisible, relecture de u.data", exc_info=True)
     column_names = ['user_id', 'item_id', 'rating', 'timestamp']
-    data = pd.read_csv(url, sep='\t', names=column_names)
+    data = pd.read_csv(movielens_path("u.data"), sep='\t', names=column_names, dtype={'rating': float})
+    # Écriture atomique : un processus concurrent ne lit jamais un pickle partiel
+    tmp_path = f"{RATINGS_CACHE_PATH}.{os.getpid()}"
+    data.to_pickle(tmp_path)
+    os.replace(tmp_path, RATINGS_CACHE_PATH)
+    return data
+
+# Note moyenne et nombre de notes par film, calculés une seule fois
+@lru_cache(maxsize=1)
+def get_movie_stats():
+    return _load_raw_df().groupby('item_id')['rating'].agg(['mean', 'count'])
+
+# Positions des notes de chaque utilisateur / film dans le DataFrame, calculées une seule fois
+@lru_cache(maxsize=1)
+def get_user_index():
+    return _load_raw_df().groupby('user_id').indices
+
+@lru_cache(maxsize=1)
+def get_movie_index():
+    return _load_raw_df().groupby('item_id').indices
+
+# Indices des k plus grandes valeurs, triés par valeur décroissante
+def top_k_indices(values, k: int):
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    # Sélection partielle en O(n) (sans copie négative du tableau) puis tri des k valeurs retenues seulement
+    top = np.argpartition(values, n - k)[n - k:]
+    return top[np.argsort(values[top])[::-1]]
+
+# Construire le Dataset Surprise à partir des notes en cache
+@lru_cache(maxsize=1)
+def load_data():
+    data = _load_raw_df()
     reader = Reader(rating_scale=(1, 5))
     dataset = Dataset.load_from_df(data[['user_id', 'item_id', 'rating']], reader)
     return dataset
 
 # Initialiser et entraîner le modèle
 model = SVD()
+# Notes prédites pour tous les couples (utilisateur, film), recalculées à chaque entraînement
+all_scores = None
+# Notes prédites pour un utilisateur absent du jeu d'entraînement (identiques pour tous)
+unknown_user_scores = None
+
+def precompute_all_scores():
+    # Même calcul que SVD.estimate, pour tous les couples en un seul produit matriciel
+    trainset = model.trainset
+    scores = model.pu @ model.qi.T + model.bu[:, None] + model.bi[None, :] + trainset.global_mean
+    return np.clip(scores, *trainset.rating_scale, out=scores)
+
+def _update_scores():
+    global all_scores, unknown_user_scores
+    trainset = model.trainset
+    all_scores = precompute_all_scores()
+    # Utilisateur inconnu : seul le biais des films compte, comme model.predict
+    unknown_user_scores = np.clip(trainset.global_mean + model.bi, *trainset.rating_scale)
 
 def train_model():
     dataset = load_data()
     trainset = dataset.build_full_trainset()
     model.fit(trainset)
+    _update_scores()
+    # Sauvegarde atomique du modèle (avec son trainset) pour les prochains démarrages
+    tmp_path = f"{MODEL_CACHE_PATH}.{os.getpid()}"
+    joblib.dump(model, tmp_path, compress=3)
+    os.replace(tmp_path, MODEL_CACHE_PATH)
     return {"message": "Modèle entraîné avec succès !"}
 
+# Recharger le modèle sauvegardé s'il est plus récent que u.data, sinon l'entraîner
+def load_or_train_model():
+    global model
+    if _is_fresh(MODEL_CACHE_PATH, _ratings_source_mtime()):
+        try:
+            model = joblib.load(MODEL_CACHE_PATH)
+            _update_scores()
+            return
+        except Exception:
+            # Fichier corrompu ou incompatible (ex. après une mise à jour de scikit-surprise)
+            logger.warning("Modèle sauvegardé illisible, ré-entraînement", exc_info=True)
+            model = SVD()
+    train_model()
+
 def get_recommendations(user_id: int, num_recommendations: int = 5):
-    recommendations = []
-    dataset = load_data()
-    testset = dataset.build_full_trainset().build_testset()
-    for movie_id in range(1, 1683):  # Les ID de films vont de 1 à 1682 dans ml-100k
-        prediction = model.predict(user_id, movie_id)
-        recommendations.append({"movie_id": movie_id, "predicted_rating": prediction.est})
-    # Trier par note prédite et retourner les meilleures recommandations
-    recommendations.sort(key=lambda x: x["predicted_rating"], reverse=True)
-    return recommendations[:num_recommendations]
+    # Le modèle garde le trainset de son dernier fit : inutile de recharger les données
+    trainset = model.trainset
+    try:
+        scores = all_scores[trainset.to_inner_uid(user_id)]
+    except ValueError:
+        scores = unknown_user_scores
+    return [
+        {"movie_id": trainset.to_raw_iid(inner_iid), "predicted_rating": float(scores[inner_iid])}
+        for inner_iid in top_k_indices(scores, num_recommendations)
+    ]
@@ -1,7 +1,30 @@
+from functools import lru_cache
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
+MOVIELENS_URL = "http://files.grouplens.org/datasets/movielens/ml-100k"
+# Répertoire local des fichiers MovieLens (téléchargés à la construction de l'image Docker)
+MOVIELENS_DIR = os.environ.get("MOVIELENS_DIR", "/data/ml-100k")
+
+def movielens_path(file_name: str):
+    # Fichier local s'il existe, sinon téléchargement depuis GroupLens
+    local_path = os.path.join(MOVIELENS_DIR, file_name)
+    return local_path if os.path.exists(local_path) else f"{MOVIELENS_URL}/{file_name}"
+
+@lru_cache(maxsize=1)
 def load_movie_metadata():
     # Charger les métadonnées des films (exemple avec ml-100k)
-    url = "http://files.grouplens.org/datasets/movielens/ml-100k/u.item"
     column_names = ['movie_id', 'title', 'release_date', 'video_release_date', 'IMDb_URL']
-    return pd.read_csv(url, sep='|', names=column_names, encoding='latin1', usecols=range(5))
+    return pd.read_csv(movielens_path("u.item"), sep='|', names=column_names, encoding='latin1', usecols=range(5))
+
+# Titres au format Arrow, construits une seule fois pour la recherche
+@lru_cache(maxsize=1)
+def load_movie_titles():
+    return pa.array(load_movie_metadata()['title'].astype(str))
+
+def search_movie_titles(query: str):
+    # Masque des films dont le titre contient `query` (noyau C++ Arrow, insensible à la casse)
+    mask = pc.match_substring(load_movie_titles(), query, ignore_case=True)
+    return mask.to_numpy(zero_copy_only=False)
@@ -1,11 +1,26 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.routers.recommender import router as recommender_router
+from app.services.recommendation_service import (
+    load_or_train_model, get_movie_stats, get_user_index, get_movie_index
+)
+from app.utils.data_loader import load_movie_titles
 
-app = FastAPI(title="Movie Recommendation API", version="1.0.0")
+# orjson sérialise les réponses plus vite que le module json standard
+app = FastAPI(title="Movie Recommendation API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Inclure les routeurs
 app.include_router(recommender_router, prefix="/api", tags=["recommender"])
 
+# Charger (ou entraîner) le modèle et précalculer statistiques et index au démarrage
+@app.on_event("startup")
+def train_on_startup():
+    load_or_train_model()
+    get_movie_stats()
+    get_user_index()
+    get_movie_index()
+    load_movie_titles()
+
 @app.get("/")
 def read_root():
     return {"message": "Bienvenue sur l'API de recommandation de films !"}
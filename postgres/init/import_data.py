@@ -1,8 +1,14 @@
 #!/usr/bin/env python3  # Spécifie l'interpréteur Python à utiliser
+import csv  
+import io  
 import os  
 import sys 
-import pandas as pd  
-from sqlalchemy import create_engine, text  # Outils pour interagir avec une base de données SQL
+from concurrent.futures import ThreadPoolExecutor  # Pool de threads pour les COPY parallèles
+import numpy as np  # Encodage vectorisé du format COPY binaire
+import pyarrow as pa  # Types de colonnes PyArrow
+import pyarrow.compute as pc  # Filtres vectorisés sur les colonnes PyArrow
+import pyarrow.csv as pacsv  # Lecteur CSV PyArrow (parseur C++ multi-threadé)
+from sqlalchemy import create_engine, text, BigInteger, Integer, Float  # Outils pour interagir avec une base de données SQL
 from sqlalchemy.exc import OperationalError  # Exception pour les erreurs de connexion SQLAlchemy
 from loguru import logger  
 
@@ -11,11 +17,13 @@ from models import Base, Movie, Rating  # Importation des modèles SQLAlchemy d
 
 # Configure logger
 logger.remove()  # Supprime les configurations de journalisation par défaut
-logger.add(sys.stderr, level="INFO")  # Ajoute une sortie de journalisation sur stderr avec le niveau INFO
+# Sortie sur stderr avec le niveau INFO : les messages sont formatés et écrits par un thread dédié (enqueue),
+# pas par les threads d'import ; traces d'exception sans valeurs des variables (diagnose) ni frames hors capture
+logger.add(sys.stderr, level="INFO", enqueue=True, backtrace=False, diagnose=False)
 
-def get_db_engine():
+def get_db_engine(pool_size=5):
     """
-    Crée et retourne un moteur SQLAlchemy pour la connexion à PostgreSQL.
+    Crée et retourne un moteur SQLAlchemy pour la connexion à PostgreSQL, avec `pool_size` connexions réutilisables.
     """
     # Pour les variables d'environnement, la methode os.environ.get("NOM_VARIABLE", "valeur_par_defaut") permet de récupérer la valeur de la variable d'environnement
     # le premier argument est le nom de la variable d'environnement et le deuxième argument est la valeur par défaut si la variable n'est pas définie
@@ -30,69 +38,420 @@ def get_db_engine():
     database = os.environ.get("POSTGRES_DB", "moviesdb")  # Récupère le nom de la base de données
 
     # Construit l'URL de connexion à PostgreSQL
-    db_url = f"postgresql://{user}:{password}@{host}:{port}/{database}"
+    db_url = f"postgresql+psycopg://{user}:{password}@{host}:{port}/{database}"  # Pilote psycopg 3
     
-    return create_engine(db_url)  # Retourne un moteur SQLAlchemy
+    return create_engine(  # Retourne un moteur SQLAlchemy
+        db_url,
+        pool_size=pool_size,  # Une connexion par COPY simultané
+        pool_pre_ping=True,  # Remplace une connexion coupée avant de la réutiliser
+        connect_args={  # Options libpq : une coupure réseau fait échouer l'import au lieu de le bloquer
+            "keepalives": 1,  # Sondes TCP keepalive sur les connexions inactives (attente d'un CREATE INDEX)
+            "keepalives_idle": 30,  # Première sonde après 30 s d'inactivité
+            "tcp_user_timeout": 30000,  # Données non acquittées après 30 s : connexion considérée perdue
+        },
+    )
 
-def create_db_schema(engine):
+def create_db_schema(connection):
     """
     Crée le schéma de la base de données à partir des modèles SQLAlchemy définis.
     """
     try:
         logger.info("Creating database schema...")  # Journalise le début de la création du schéma
-        Base.metadata.create_all(engine)  # Crée toutes les tables définies dans les modèles SQLAlchemy
+        Base.metadata.create_all(connection)  # Crée toutes les tables définies dans les modèles SQLAlchemy
         logger.success("Database schema created successfully")  # Journalise le succès de la création
     except Exception:  # Capture toute exception
         logger.exception("Error creating database schema")  # Journalise l'erreur
         raise  # Relance l'exception
 
-def import_data_with_pandas(engine, file_path, table_name, chunksize):
+class ArrowCsvStream:
     """
-    Importe les données d'un fichier CSV dans une table PostgreSQL en utilisant pandas.
+    Flux lu par COPY FROM STDIN : les blocs PyArrow sont sérialisés en CSV au fur et à mesure de la lecture,
+    si bien qu'un seul bloc encodé est en mémoire à la fois.
     """
+
+    def __init__(self, reader):
+        self.batches = iter(reader)  # Blocs restant à envoyer
+        self.write_options = pacsv.WriteOptions(include_header=False)  # COPY attend uniquement les données
+        self.chunk = memoryview(b"")  # CSV du bloc courant
+        self.position = 0  # Position de lecture dans le bloc courant
+        self.rows = 0  # Nombre de lignes déjà sérialisées
+
+    def read(self, size=-1):
+        while self.position >= len(self.chunk):  # Bloc courant épuisé : sérialise le suivant
+            record_batch = next(self.batches, None)
+            if record_batch is None:
+                return b""  # Fin du fichier
+            buffer = io.BytesIO()
+            pacsv.write_csv(record_batch, buffer, write_options=self.write_options)  # Re-sérialise le bloc en CSV
+            self.chunk = buffer.getbuffer()  # Vue sans copie sur le tampon
+            self.position = 0
+            self.rows += record_batch.num_rows
+        end = len(self.chunk) if size < 0 else min(self.position + size, len(self.chunk))
+        data = self.chunk[self.position:end].tobytes()
+        self.position = end
+        return data
+
+def copy_from_file(connection, copy_sql, source, size=1 << 20):
+    """
+    Envoie le contenu d'un objet fichier à une commande COPY ... FROM STDIN, par morceaux de `size` octets,
+    dans la transaction en cours. Retourne le nombre de lignes importées.
+    """
+    with connection.connection.cursor() as cursor:  # Curseur psycopg partageant la transaction en cours, fermé en sortie
+        with cursor.copy(copy_sql) as copy:  # Les morceaux sont transmis au serveur pendant la lecture suivante
+            while data := source.read(size):
+                copy.write(data)
+        return cursor.rowcount
+
+def read_csv_header(file_path):
+    """
+    Retourne la liste des colonnes déclarées sur la première ligne d'un fichier CSV.
+    """
+    with open(file_path, newline="", encoding="utf-8-sig") as csv_file:  # utf-8-sig ignore un éventuel BOM
+        return next(csv.reader(csv_file))
+
+def is_single_precision(column_type):
+    """
+    Indique si une colonne Float est stockée en simple précision (real) par PostgreSQL.
+    """
+    return column_type.precision is not None and column_type.precision <= 24
+
+def arrow_column_types(table_name):
+    """
+    Retourne les types PyArrow des colonnes d'une table, pour que le lecteur CSV ne les infère pas bloc par bloc.
+    """
+    column_types = {}
+    for column in Base.metadata.tables[table_name].columns:
+        if isinstance(column.type, BigInteger):  # BigInteger hérite d'Integer : à tester en premier
+            column_types[column.name] = pa.int64()
+        elif isinstance(column.type, Integer):
+            column_types[column.name] = pa.int32()
+        elif isinstance(column.type, Float):
+            column_types[column.name] = pa.float32() if is_single_precision(column.type) else pa.float64()
+        else:  # Colonnes texte
+            column_types[column.name] = pa.string()
+    return column_types
+
+# En-tête et fin d'un flux COPY au format binaire : signature, flags, longueur d'extension, puis -1 en fin de flux
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00\x00\x00\x00" + b"\x00\x00\x00\x00"
+COPY_BINARY_TRAILER = b"\xff\xff"
+# Taille maximale d'une plage envoyée par un worker (borne la mémoire de chaque worker)
+RANGE_SIZE = 64 << 20
+# Mémoire de tri accordée à la transaction de transfert : les index et la validation de la clé étrangère
+# sont construits en mémoire au lieu de déborder dans des fichiers temporaires
+MAINTENANCE_WORK_MEM = "1GB"
+WORK_MEM = "256MB"
+
+def split_csv_ranges(file_path, parts):
+    """
+    Découpe un fichier CSV (hors en-tête) en au plus `parts` plages d'octets alignées sur des débuts de ligne.
+    Les champs ne doivent pas contenir de retour à la ligne, ce qui est le cas des fichiers numériques comme ratings.csv.
+    """
+    size = os.path.getsize(file_path)  # Taille totale du fichier
+    with open(file_path, "rb") as csv_file:
+        csv_file.readline()  # Saute l'en-tête
+        bounds = [csv_file.tell()]  # Début des données
+        for part in range(1, parts):
+            csv_file.seek(max(bounds[0], size * part // parts))  # Position approximative de la coupure
+            csv_file.readline()  # Avance jusqu'au début de la ligne suivante
+            bounds.append(csv_file.tell())
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]  # Ignore les plages vides
+
+def binary_row_dtype(table_name, columns):
+    """
+    Retourne le dtype NumPy d'une ligne COPY binaire (nombre de champs, puis longueur et valeur big-endian
+    de chaque champ) pour les colonnes données, ou None si l'une d'elles n'est pas numérique.
+    """
+    table = Base.metadata.tables[table_name]
+    fields = [("field_count", ">i2")]
+    for position, name in enumerate(columns):
+        column_type = table.columns[name].type
+        if isinstance(column_type, BigInteger):  # BigInteger hérite d'Integer : à tester en premier
+            value_type = ">i8"  # int8
+        elif isinstance(column_type, Integer):
+            value_type = ">i4"  # int4
+        elif isinstance(column_type, Float):
+            value_type = ">f4" if is_single_precision(column_type) else ">f8"  # float4 (real) ou float8 (double precision)
+        else:
+            return None  # Colonne texte : format CSV
+        fields += [(f"length_{position}", ">i4"), (f"value_{position}", value_type)]
+    return np.dtype(fields)  # dtype compact, sans alignement : identique au format du flux
+
+def encode_copy_binary(table, row_dtype):
+    """
+    Encode une table PyArrow sans valeurs nulles au format COPY binaire, colonne par colonne avec NumPy.
+    """
+    rows = np.empty(table.num_rows, dtype=row_dtype)  # Une ligne COPY par enregistrement
+    rows["field_count"] = table.num_columns
+    for position in range(table.num_columns):
+        value_field = f"value_{position}"
+        rows[f"length_{position}"] = row_dtype[value_field].itemsize  # Taille fixe des valeurs numériques
+        rows[value_field] = table.column(position).to_numpy()  # Conversion en big-endian à l'affectation
+    payload = io.BytesIO()
+    payload.write(COPY_BINARY_HEADER)
+    payload.write(rows.data)
+    payload.write(COPY_BINARY_TRAILER)
+    payload.seek(0)
+    return payload
+
+def copy_csv_range(engine, file_path, table_name, columns, start, end, target_table=None):
+    """
+    Envoie une plage d'octets d'un fichier CSV à COPY sur sa propre connexion et dans sa propre transaction.
+    Les plages entièrement numériques et sans valeur nulle sont converties au format binaire, que le serveur
+    n'a pas à analyser ; les autres sont envoyées telles quelles au format CSV.
+    Les types sont ceux du modèle `table_name` ; les lignes sont écrites dans `target_table` (par défaut la même table).
+    """
+    target_table = target_table or table_name
+    with open(file_path, "rb") as csv_file:
+        csv_file.seek(start)
+        data = csv_file.read(end - start)  # Octets de la plage
+
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    copy_sql = f"COPY {target_table} ({column_list}) FROM STDIN WITH (FORMAT CSV)"  # Plage sans en-tête
+    payload = io.BytesIO(data)
+    row_dtype = binary_row_dtype(table_name, columns)
+    if row_dtype is not None:
+        column_types = arrow_column_types(table_name)
+        table = pacsv.read_csv(  # Analyse multi-threadée de la plage
+            pa.BufferReader(data),
+            read_options=pacsv.ReadOptions(column_names=columns),  # La plage n'a pas d'en-tête
+            convert_options=pacsv.ConvertOptions(column_types={name: column_types[name] for name in columns}),
+        )
+        if all(column.null_count == 0 for column in table.columns):  # NULL n'a pas de taille fixe
+            copy_sql = f"COPY {target_table} ({column_list}) FROM STDIN WITH (FORMAT BINARY)"
+            payload = encode_copy_binary(table, row_dtype)
+        del table
+
+    with engine.begin() as connection:  # Une connexion du pool par plage
+        connection.execute(text("SET LOCAL synchronous_commit = OFF"))  # Pas d'attente du WAL au COMMIT
+        return copy_from_file(connection, copy_sql, payload)
+
+def import_data_in_parallel(engine, file_path, table_name, workers, target_table=None):
+    """
+    Importe un fichier CSV dans une table PostgreSQL avec plusieurs COPY simultanés, un par plage du fichier
+    et par connexion. PyArrow, NumPy et psycopg libèrent le GIL pendant l'analyse, l'encodage et l'envoi :
+    des threads suffisent.
+    Chaque plage est validée séparément ; en cas d'échec la table peut être partiellement remplie.
+    `target_table` permet d'écrire dans une table de même structure que `table_name` (table de transit).
+    Un fichier contenant des colonnes absentes de la table est importé en une seule passe par import_data_with_arrow.
+    """
+    target_table = target_table or table_name
+    columns = read_csv_header(file_path)  # Colonnes dans l'ordre du fichier
+    if not set(columns) <= set(Base.metadata.tables[table_name].columns.keys()):
+        with engine.begin() as connection:  # Projection nécessaire : import séquentiel avec PyArrow
+            return import_data_with_arrow(connection, file_path, table_name, target_table=target_table)
+
     try:
-        logger.info(f"Importing data from {file_path} into {table_name} table")  # Journalise le début de l'importation
-        df = pd.read_csv(file_path)  # Charge le fichier CSV dans un DataFrame pandas
-        logger.info(f"Found {len(df)} records in CSV file")  # Journalise le nombre d'enregistrements trouvés
-        
-        # Insère les données dans la table cible par lots
-        df.to_sql(
-            table_name,  # Nom de la table cible
-            engine,  # Moteur SQLAlchemy pour la connexion
-            if_exists='append',  # Ajoute les données à la table existante
-            index=False,  # N'insère pas l'index du DataFrame
-            chunksize=chunksize,  # Nombre d'enregistrements par lot
-            method='multi'  # Utilise une méthode d'insertion optimisée
+        parts = max(workers, -(-os.path.getsize(file_path) // RANGE_SIZE))  # Plages d'au plus RANGE_SIZE octets
+        ranges = split_csv_ranges(file_path, parts)
+        logger.info(f"Importing data from {file_path} into {target_table} table with {workers} parallel COPY")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(copy_csv_range, engine, file_path, table_name, columns, start, end, target_table)
+                for start, end in ranges
+            ]
+            total = sum(future.result() for future in futures)  # Relance la première erreur rencontrée
+
+        logger.success(f"Imported {total} records into {target_table} table")  # Journalise le succès de l'importation
+        return total  # Retourne le nombre total d'enregistrements importés
+    except Exception:  # Capture toute exception
+        logger.exception(f"Error importing data from {file_path} to {target_table}")  # Journalise l'erreur
+        raise  # Relance l'exception
+
+# Entiers acceptés lors de la validation (au plus 38 chiffres, la précision d'un decimal128) ; les bornes du type
+# de la colonne sont vérifiées ensuite
+INTEGER_PATTERN = r"^-?\d{1,38}$"
+WIDE_DECIMAL = pa.decimal128(38, 0)
+
+def integer_in_range(values, column_type):
+    """
+    Masque des valeurs texte qui sont des entiers représentables par `column_type` (int32, int64...).
+    Les valeurs nulles donnent NULL.
+    """
+    well_formed = pc.match_substring_regex(values, INTEGER_PATTERN)
+    numbers = pc.cast(pc.if_else(well_formed, values, "0"), WIDE_DECIMAL)  # Conversion sans dépassement possible
+    # Bornes du type entier de la colonne (dtype NumPy équivalent, sans passer par pandas)
+    bounds = np.iinfo(f"{'u' if pa.types.is_unsigned_integer(column_type) else ''}int{column_type.bit_width}")
+    return pc.and_(well_formed, pc.and_(
+        pc.greater_equal(numbers, pa.scalar(int(bounds.min)).cast(WIDE_DECIMAL)),
+        pc.less_equal(numbers, pa.scalar(int(bounds.max)).cast(WIDE_DECIMAL)),
+    ))
+
+def validated_batches(reader, table_name, column_types):
+    """
+    Filtre les blocs d'un lecteur CSV dont les colonnes entières ont été lues comme texte : les lignes dont une valeur
+    entière est mal formée ou hors des bornes de son type, ou dont une colonne NOT NULL est vide, sont écartées,
+    puis les colonnes sont converties. Seule la première ligne de chaque clé primaire est conservée.
+    """
+    table = Base.metadata.tables[table_name]
+    schema = pa.schema([(name, column_types[name]) for name in reader.schema.names])  # Types de la table
+    key_names = [column.name for column in table.primary_key.columns]  # Colonnes de la clé primaire
+    seen = schema.empty_table().select(key_names)  # Clés déjà envoyées par les blocs précédents
+    rejected = 0  # Nombre de lignes invalides écartées
+    duplicates = 0  # Nombre de doublons de clé primaire écartés
+    for batch in reader:
+        keep = pa.array(np.ones(batch.num_rows, dtype=bool))  # Lignes conservées
+        columns = []
+        for name, values in zip(batch.schema.names, batch.columns):
+            if pa.types.is_integer(column_types[name]):
+                values = pc.utf8_trim_whitespace(values)
+                valid_integer = integer_in_range(values, column_types[name])
+                keep = pc.and_(keep, pc.or_(pc.is_null(values), valid_integer.fill_null(False)))
+            if not table.columns[name].nullable:
+                keep = pc.and_(keep, pc.is_valid(values))
+            columns.append(values)
+        batch = pa.RecordBatch.from_arrays(columns, names=batch.schema.names).filter(keep)
+        rejected += len(keep) - batch.num_rows
+        batch = batch.cast(schema)  # Conversion sans erreur possible : les valeurs ont été vérifiées
+
+        # Première occurrence de chaque clé du bloc, parmi les clés absentes des blocs précédents
+        keys = pa.Table.from_batches([batch]).select(key_names).append_column("row", pa.array(np.arange(batch.num_rows)))
+        first = keys.group_by(key_names, use_threads=False).aggregate([("row", "min")])
+        new_keys = first.join(seen, keys=key_names, join_type="left anti")
+        unique = np.zeros(batch.num_rows, dtype=bool)
+        unique[new_keys.column("row_min").to_numpy()] = True
+        seen = pa.concat_tables([seen, new_keys.select(key_names)])
+        duplicates += batch.num_rows - len(new_keys)
+        yield batch.filter(pa.array(unique))
+    if rejected or duplicates:  # Journalise les lignes écartées
+        logger.warning(f"Skipped {rejected} invalid rows and {duplicates} duplicate rows for {table_name} table")
+
+def import_data_with_arrow(connection, file_path, table_name, validate=False, target_table=None):
+    """
+    Importe les données d'un fichier CSV dans une table PostgreSQL : le fichier est lu par blocs avec PyArrow,
+    réduit aux colonnes de la table, puis envoyé en une seule commande COPY.
+    Avec `validate`, les lignes invalides (entier mal formé, colonne obligatoire vide) sont écartées au lieu
+    de faire échouer l'import.
+    Les colonnes et leurs types sont ceux du modèle `table_name` ; les lignes sont écrites dans `target_table`
+    (par défaut la même table).
+    """
+    target_table = target_table or table_name
+    try:
+        logger.info(f"Importing data from {file_path} into {target_table} table")  # Journalise le début de l'importation
+        column_types = arrow_column_types(table_name)  # Types des colonnes de la table cible
+        read_types = dict(column_types)
+        if validate:  # Colonnes entières lues comme texte, pour être vérifiées avant conversion
+            read_types.update({name: pa.string() for name, type_ in column_types.items() if pa.types.is_integer(type_)})
+        reader = pacsv.open_csv(  # Lecteur CSV en flux : le fichier n'est jamais chargé en entier
+            file_path,
+            read_options=pacsv.ReadOptions(block_size=16 << 20),  # Taille des blocs lus (16 Mo)
+            convert_options=pacsv.ConvertOptions(  # Ne garde que les colonnes de la table, avec leurs types
+                include_columns=[name for name in read_csv_header(file_path) if name in column_types],
+                column_types=read_types,
+                strings_can_be_null=validate,  # Champ vide : NULL, écarté si la colonne est obligatoire
+            ),
         )
-        logger.success(f"Imported {len(df)} records into {table_name} table")  # Journalise le succès de l'importation
-        return len(df)  # Retourne le nombre total d'enregistrements importés
+        columns = ", ".join(f'"{name}"' for name in reader.schema.names)  # Colonnes dans l'ordre du fichier
+        copy_sql = f"COPY {target_table} ({columns}) FROM STDIN WITH (FORMAT CSV)"  # Chargement en masse PostgreSQL
+        batches = validated_batches(reader, table_name, column_types) if validate else reader
+        stream = ArrowCsvStream(batches)  # Blocs sérialisés à la demande pendant le COPY
+
+        copy_from_file(connection, copy_sql, stream)  # Envoie le fichier par morceaux de 1 Mo
+
+        logger.success(f"Imported {stream.rows} records into {target_table} table")  # Journalise le succès de l'importation
+        return stream.rows  # Retourne le nombre total d'enregistrements importés
+    except Exception:  # Capture toute exception
+        logger.exception(f"Error importing data from {file_path} to {target_table}")  # Journalise l'erreur
+        raise  # Relance l'exception
+
+def create_staging_table(connection, table_name):
+    """
+    Crée une table de transit UNLOGGED de même structure que `table_name`, sans index ni contrainte :
+    les COPY y écrivent sans WAL ni maintenance d'index, et l'autovacuum ne la parcourt pas. Retourne son nom.
+    """
+    staging_table = f"{table_name}_stg"  # Nom de la table de transit
+    try:
+        logger.info(f"Creating staging table {staging_table}")  # Journalise la création
+        connection.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))  # Reste d'un import interrompu
+        connection.execute(text(
+            f"CREATE UNLOGGED TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS) "
+            "WITH (autovacuum_enabled = false)"  # Pas de VACUUM/ANALYZE concurrent pendant les COPY
+        ))
+        return staging_table
     except Exception:  # Capture toute exception
-        logger.exception(f"Error importing data from {file_path} to {table_name}")  # Journalise l'erreur
+        logger.exception(f"Error creating staging table {staging_table}")  # Journalise l'erreur
         raise  # Relance l'exception
 
-def create_indexes(engine):
+def move_staging_table(connection, table_name, staging_table, order_by):
+    """
+    Transfère le contenu de la table de transit dans la table de production en une seule requête, puis la supprime.
+    Les lignes sont insérées triées selon `order_by` (la clé primaire) : la table est rangée dans l'ordre de son index
+    et chaque insertion dans l'index se fait en fin d'arbre.
+    """
+    try:
+        logger.info(f"Moving {staging_table} into {table_name}")  # Journalise le transfert
+        result = connection.execute(text(
+            f"INSERT INTO {table_name} SELECT * FROM {staging_table} ORDER BY {', '.join(order_by)}"
+        ))
+        connection.execute(text(f"DROP TABLE {staging_table}"))  # La table de transit n'est plus utile
+        logger.success(f"Moved {result.rowcount} records into {table_name} table")  # Journalise le succès du transfert
+        return result.rowcount
+    except Exception:  # Capture toute exception
+        logger.exception(f"Error moving {staging_table} into {table_name}")  # Journalise l'erreur
+        raise  # Relance l'exception
+
+def drop_ratings_foreign_key(connection):
+    """
+    Supprime la clé étrangère ratings -> movies avant le chargement en masse, pour ne pas la vérifier ligne par ligne.
+    """
+    try:
+        logger.info("Dropping ratings foreign key before bulk load")  # Journalise la suppression
+        connection.execute(text("ALTER TABLE ratings DROP CONSTRAINT IF EXISTS ratings_movie_fk"))
+    except Exception:  # Capture toute exception
+        logger.exception("Error dropping ratings foreign key")  # Journalise l'erreur
+        raise  # Relance l'exception
+
+def add_ratings_foreign_key(connection):
+    """
+    Recrée la clé étrangère ratings -> movies après le chargement : elle est validée en un seul parcours de la table.
+    """
+    try:
+        logger.info("Adding ratings foreign key")  # Journalise la création
+        connection.execute(text(
+            "ALTER TABLE ratings ADD CONSTRAINT ratings_movie_fk FOREIGN KEY (movie_id) REFERENCES movies(movie_id)"
+        ))
+    except Exception:  # Capture toute exception
+        logger.exception("Error adding ratings foreign key")  # Journalise l'erreur
+        raise  # Relance l'exception
+
+def create_indexes(connection):
     """
     Crée des index sur les tables pour améliorer les performances des requêtes.
     """
     try:
         logger.info("Creating database indexes...")  # Journalise le début de la création des index
         
-        with engine.connect() as connection:  # Établit une connexion à la base de données
-            # Crée un index sur la colonne user_id de la table ratings
-            connection.execute(text(
-                "CREATE INDEX IF NOT EXISTS idx_ratings_user ON ratings(user_id)"
-            ))
-            
-            # Crée un index sur la colonne movie_id de la table ratings
-            connection.execute(text(
-                "CREATE INDEX IF NOT EXISTS idx_ratings_movie ON ratings(movie_id)"
-            ))
+        # Crée un index sur la colonne user_id de la table ratings
+        # (pages pleines : la table n'est plus modifiée après l'import, inutile de réserver de la place)
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_ratings_user ON ratings(user_id) WITH (fillfactor = 100)"
+        ))
+        
+        # Crée un index couvrant sur movie_id : les agrégats par film (note moyenne, nombre de notes)
+        # sont calculés depuis l'index seul, sans lire la table
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_ratings_movie_cov ON ratings(movie_id) INCLUDE (rating) WITH (fillfactor = 100)"
+        ))
             
         logger.success("Database indexes created successfully")  # Journalise le succès de la création des index
     except Exception:  # Capture toute exception
         logger.exception("Error creating database indexes")  # Journalise l'erreur
         raise  # Relance l'exception
 
+def vacuum_analyze(engine, table_name):
+    """
+    Met à jour la carte de visibilité et les statistiques d'une table après le chargement, pour que le planificateur
+    connaisse le nombre de lignes et puisse utiliser les parcours d'index seuls.
+    """
+    try:
+        logger.info(f"Running VACUUM ANALYZE on {table_name}")  # Journalise le début du VACUUM
+        # VACUUM ne peut pas s'exécuter dans une transaction : connexion en autocommit
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"VACUUM ANALYZE {table_name}"))
+    except Exception:  # Capture toute exception
+        logger.exception(f"Error running VACUUM ANALYZE on {table_name}")  # Journalise l'erreur
+        raise  # Relance l'exception
+
 def main():
     """
     Fonction principale qui orchestre le processus complet d'importation des données.
@@ -101,21 +460,47 @@ def main():
         data_dir = "/data"  # Répertoire contenant les fichiers CSV
         movies_path = os.path.join(data_dir, "movies_metadata.csv")  # Chemin vers le fichier des films
         ratings_path = os.path.join(data_dir, "ratings.csv")  # Chemin vers le fichier des évaluations
+        workers = min(os.cpu_count() or 1, 8)  # Nombre de COPY simultanés (une connexion du pool chacun)
         
         logger.info("Connecting to PostgreSQL database...")  # Journalise le début de la connexion
+        engine = get_db_engine(pool_size=workers)  # Crée le moteur de connexion à la base de données
         try:
-            engine = get_db_engine()  # Crée le moteur de connexion à la base de données
-            with engine.connect() as connection:  # Teste la connexion
-                connection.execute(text("SELECT 1")).fetchone()  # Exécute une requête simple
+            connection = engine.raw_connection()  # Ouvre une connexion du pool, réutilisée ensuite par l'import
+            try:
+                # Test du pilote, en autocommit : ni BEGIN ni ROLLBACK autour de la requête de test
+                engine.dialect.do_ping(connection.dbapi_connection)
+            finally:
+                connection.close()  # Rend la connexion au pool
             logger.info("Successfully connected to PostgreSQL")  # Journalise le succès de la connexion
-        except OperationalError:  # Capture les erreurs de connexion
+        except (OperationalError, engine.dialect.loaded_dbapi.OperationalError):  # Capture les erreurs de connexion
             logger.exception("Failed to connect to PostgreSQL")  # Journalise l'erreur
             sys.exit(1)  # Quitte le programme avec un code d'erreur
         
-        create_db_schema(engine)  # Crée le schéma de la base de données
-        import_data_with_pandas(engine, movies_path, 'movies', chunksize=1000)  # Importe les données des films
-        import_data_with_pandas(engine, ratings_path, 'ratings', chunksize=5000)  # Importe les données des évaluations
-        create_indexes(engine)  # Crée les index
+        # Le schéma doit être validé avant les COPY parallèles, qui utilisent d'autres connexions
+        with engine.begin() as connection:
+            # Le COMMIT n'attend pas l'écriture du WAL sur disque (import ré-exécutable en cas de crash)
+            connection.execute(text("SET LOCAL synchronous_commit = OFF"))
+            create_db_schema(connection)  # Crée le schéma de la base de données
+            # Les évaluations sont chargées dans une table de transit UNLOGGED : pas de WAL pendant les COPY
+            ratings_staging = create_staging_table(connection, 'ratings')
+            # Importe les données des films : fichier peu volumineux, validé ligne à ligne avant le COPY
+            import_data_with_arrow(connection, movies_path, 'movies', validate=True)
+
+        # Importe les données des évaluations dans la table de transit
+        import_data_in_parallel(engine, ratings_path, 'ratings', workers, target_table=ratings_staging)
+
+        with engine.begin() as connection:
+            connection.execute(text("SET LOCAL synchronous_commit = OFF"))
+            connection.execute(text(f"SET LOCAL maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'"))  # CREATE INDEX
+            connection.execute(text(f"SET LOCAL work_mem = '{WORK_MEM}'"))  # Tri du transfert, validation de la clé étrangère
+            drop_ratings_foreign_key(connection)  # Pas de vérification de clé étrangère ligne par ligne
+            # Transfert en une seule requête, dans l'ordre de la clé primaire
+            move_staging_table(connection, 'ratings', ratings_staging, order_by=['user_id', 'movie_id'])
+            add_ratings_foreign_key(connection)  # Valide la clé étrangère en un seul parcours
+            create_indexes(connection)  # Crée les index
+
+        vacuum_analyze(engine, 'movies')  # Statistiques à jour pour le planificateur
+        vacuum_analyze(engine, 'ratings')
         
         logger.success("Data import completed successfully")  # Journalise le succès du processus
     except Exception:  # Capture toute exception
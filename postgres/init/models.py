@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, BigInteger, ForeignKey  # Importation des types de colonnes et des clés étrangères
-from sqlalchemy.ext.declarative import declarative_base  # Importation pour définir une base de modèles SQLAlchemy
+from sqlalchemy import Column, Integer, Text, Float, ForeignKey  # Importation des types de colonnes et des clés étrangères
+from sqlalchemy.orm import declarative_base  # Importation pour définir une base de modèles SQLAlchemy
 
 Base = declarative_base()  # Création d'une classe de base pour tous les modèles SQLAlchemy
 
@@ -7,8 +7,8 @@ class Movie(Base):  # Définition du modèle pour la table 'movies'
     __tablename__ = 'movies'  # Nom de la table dans la base de données
     
     movie_id = Column(Integer, primary_key=True)  # Colonne 'movie_id' de type entier, clé primaire
-    title = Column(String(255), nullable=False)  # Colonne 'title' de type chaîne de caractères, non nulle
-    genres = Column(String(255), nullable=False)  # Colonne 'genres' de type chaîne de caractères, non nulle
+    title = Column(Text, nullable=False)  # Colonne 'title' de type texte (sans limite de longueur à vérifier), non nulle
+    genres = Column(Text, nullable=False)  # Colonne 'genres' de type texte (sans limite de longueur à vérifier), non nulle
     
     def __repr__(self):  # Méthode pour représenter l'objet sous forme de chaîne
         return f"<Movie(movie_id={self.movie_id}, title='{self.title}')>"
@@ -17,9 +17,9 @@ class Rating(Base):  # Définition du modèle pour la table 'ratings'
     __tablename__ = 'ratings'  # Nom de la table dans la base de données
     
     user_id = Column(Integer, primary_key=True)  # Colonne 'user_id' de type entier, clé primaire
-    movie_id = Column(Integer, ForeignKey('movies.movie_id'), primary_key=True)  # Colonne 'movie_id', clé étrangère vers 'movies.movie_id', clé primaire composite
-    rating = Column(Float, nullable=False)  # Colonne 'rating' de type flottant, non nulle
-    timestamp = Column(BigInteger)  # Colonne 'timestamp' de type entier long, peut être nulle
+    movie_id = Column(Integer, ForeignKey('movies.movie_id', name='ratings_movie_fk'), primary_key=True)  # Colonne 'movie_id', clé étrangère nommée vers 'movies.movie_id', clé primaire composite
+    rating = Column(Float(precision=24), nullable=False)  # Colonne 'rating' de type flottant simple précision (real), non nulle : les notes par pas de 0.5 y sont exactes
+    timestamp = Column(Integer)  # Colonne 'timestamp' de type entier (secondes Unix, tiennent sur 32 bits jusqu'en 2038), peut être nulle
     
     def __repr__(self):  # Méthode pour représenter l'objet sous forme de chaîne
         return f"<Rating(user_id={self.user_id}, movie_id={self.movie_id}, rating={self.rating})>"